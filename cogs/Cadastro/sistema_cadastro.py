@@ -2,13 +2,29 @@ import discord
 from discord.ext import commands
 from discord import app_commands, ui, ButtonStyle, Color
 import os
+import io
+import re
+import csv
+import gzip
 import json
-from datetime import datetime
+import asyncio
+import tempfile
+import unicodedata
+from datetime import datetime, timedelta
+
+# ijson é dependência do /cadastro_export (ver README): com ele os arquivos são lidos registro por registro
+try:
+    import ijson
+except ImportError:
+    ijson = None
+    print("Aviso: ijson não está instalado; o /cadastro_export vai carregar cada arquivo de cadastro inteiro "
+          "na memória. Instale com: pip install ijson")
 
 DATA_DIR = os.path.join("data", "cadastros")
 NAO_CADASTRADOS_FILE = os.path.join(DATA_DIR, "naocadastrados.json")
 CADASTRADOS_FILE = os.path.join(DATA_DIR, "cadastrados.json")
 CLIENTES_FILE = os.path.join(DATA_DIR, "clientes.json")
+ESTATISTICAS_FILE = os.path.join(DATA_DIR, "estatisticas.json")
 
 ROLE_NAO_CADASTRADO = "Não Cadastrado"
 ROLE_CADASTRADO = "Cadastrado"
@@ -19,6 +35,37 @@ LOG_ENTRADA_CHANNEL = "logs-entrada"
 LOG_NAO_CLIENTE_CHANNEL = "logs-nao-sou-cliente"
 LOG_CLIENTE_CHANNEL = "logs-sou-cliente"
 
+# Etapas do funil de entrada -> cadastro -> cliente
+STAGE_ENTRADA = "entrada"
+STAGE_CADASTRADO = "cadastrado"
+STAGE_CLIENTE = "cliente"
+FUNNEL_STAGES = (STAGE_ENTRADA, STAGE_CADASTRADO, STAGE_CLIENTE)
+
+# Palavras-chave usadas para agrupar as respostas livres de "Onde ouviu falar da Alvl Lab?"
+SOURCE_BUCKETS = {
+    "YouTube": ("youtube", "yt", "video"),
+    "TikTok": ("tiktok", "tik tok"),
+    "Instagram": ("instagram", "insta", "ig"),
+    "Twitter/X": ("twitter", "x.com"),
+    "GGMAX": ("ggmax",),
+    "Google": ("google", "pesquisa", "site"),
+    "Indicação": ("amigo", "amiga", "indicacao", "indicou", "conhecido", "parceiro"),
+    "Outro servidor": ("servidor", "server", "discord"),
+}
+SOURCE_BUCKET_OTHER = "Outros"
+SOURCE_BUCKET_UNKNOWN = "Não informado"
+
+# Exportação: arquivo e campo de data de cada etapa
+EXPORT_SOURCES = {
+    STAGE_ENTRADA: (NAO_CADASTRADOS_FILE, "join_date"),
+    STAGE_CADASTRADO: (CADASTRADOS_FILE, "registration_date"),
+    STAGE_CLIENTE: (CLIENTES_FILE, "registration_date"),
+}
+EXPORT_CSV_FIELDS = ["user_id", "tier", "username", "date", "source", "project_info"]
+EXPORT_PART_MARGIN_BYTES = 512 * 1024  # Folga abaixo do limite de upload para o que o gzip ainda não escreveu
+EXPORT_SPOOL_BYTES = 1024 * 1024  # Acima disso a parte em construção vai para o disco
+EXPORT_FILES_PER_MESSAGE = 10
+
 def setup_data_files():
     os.makedirs(DATA_DIR, exist_ok=True)
     for file_path in [NAO_CADASTRADOS_FILE, CADASTRADOS_FILE, CLIENTES_FILE]:
@@ -35,6 +82,174 @@ def read_data(file_path):
 def write_data(file_path, data):
     with open(file_path, 'w', encoding='utf-8') as f: json.dump(data, f, indent=4, ensure_ascii=False)
 
+def normalize_source(source):
+    if not source:
+        return SOURCE_BUCKET_UNKNOWN
+    text = unicodedata.normalize("NFKD", source.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    words = set(re.findall(r"\w+", text))
+    for bucket, keywords in SOURCE_BUCKETS.items():
+        for keyword in keywords:
+            # Palavras compostas são buscadas no texto; as simples, palavra por palavra
+            if keyword in (text if " " in keyword or "." in keyword else words):
+                return bucket
+    return SOURCE_BUCKET_OTHER
+
+class OnboardingStats:
+    """Agregados de cadastro mantidos incrementalmente, para não varrer os arquivos de cadastro."""
+
+    def __init__(self, file_path=ESTATISTICAS_FILE, data=None):
+        self.file_path = file_path
+        self.data = data if data is not None else read_data(file_path)
+        for key in ("daily", "monthly", "sources", "monthly_sources"):
+            self.data.setdefault(key, {})
+        self.data.setdefault("funnel", {stage: 0 for stage in FUNNEL_STAGES})
+
+    def save(self):
+        write_data(self.file_path, self.data)
+
+    def _apply(self, stage, timestamp, source=None):
+        day, month = timestamp[:10], timestamp[:7]
+        daily = self.data["daily"].setdefault(day, {})
+        daily[stage] = daily.get(stage, 0) + 1
+        monthly = self.data["monthly"].setdefault(month, {})
+        monthly[stage] = monthly.get(stage, 0) + 1
+        if stage == STAGE_CADASTRADO and source is not None:
+            bucket = normalize_source(source)
+            self.data["sources"][bucket] = self.data["sources"].get(bucket, 0) + 1
+            monthly_sources = self.data["monthly_sources"].setdefault(month, {})
+            monthly_sources[bucket] = monthly_sources.get(bucket, 0) + 1
+
+    def record(self, stage, timestamp, source=None, funnel_stages=None):
+        """Registra um evento de cadastro. `funnel_stages` são as etapas do funil alcançadas pela primeira vez."""
+        self._apply(stage, timestamp, source)
+        for funnel_stage in funnel_stages if funnel_stages is not None else (stage,):
+            self.data["funnel"][funnel_stage] = self.data["funnel"].get(funnel_stage, 0) + 1
+        self.save()
+
+    def backfill(self):
+        """Reconstrói os agregados uma única vez a partir dos arquivos de cadastro existentes."""
+        if self.data.get("backfilled"):
+            return
+        nao_cadastrados, cadastrados, clientes = read_data(NAO_CADASTRADOS_FILE), read_data(
+            CADASTRADOS_FILE), read_data(CLIENTES_FILE)
+
+        # Os arquivos só guardam o estado atual de cada membro, então a data de entrada de quem já se
+        # cadastrou foi perdida: essas entradas contam só no funil, não nos agregados diários.
+        for entry in nao_cadastrados.values():
+            if entry.get("join_date"):
+                self._apply(STAGE_ENTRADA, entry["join_date"])
+        for entry in cadastrados.values():
+            if entry.get("registration_date"):
+                self._apply(STAGE_CADASTRADO, entry["registration_date"], entry.get("source"))
+        for entry in clientes.values():
+            if entry.get("registration_date"):
+                self._apply(STAGE_CLIENTE, entry["registration_date"])
+
+        funnel = self.data["funnel"]
+        funnel[STAGE_ENTRADA] += len(nao_cadastrados) + len(cadastrados) + len(clientes)
+        funnel[STAGE_CADASTRADO] += len(cadastrados) + len(clientes)
+        funnel[STAGE_CLIENTE] += len(clientes)
+        self.data["backfilled"] = True
+        self.save()
+
+def iter_records(file_path):
+    """Percorre os registros (user_id, dados) de um arquivo de cadastro.
+
+    Sem o ijson o arquivo inteiro é carregado na memória. Ao contrário de read_data, um JSON inválido
+    (ex: arquivo sendo reescrito) gera erro em vez de uma exportação vazia.
+    """
+    if ijson is None:
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                yield from json.load(f).items()
+        except FileNotFoundError:
+            pass
+        return
+    try:
+        with open(file_path, 'rb') as f:
+            yield from ijson.kvitems(f, '')
+    except FileNotFoundError:
+        return
+
+class ExportWriter:
+    """Escreve registros em partes gzip independentes, cada uma num arquivo temporário em spool."""
+
+    def __init__(self, fmt, part_bytes):
+        self.fmt = fmt
+        self.part_bytes = part_bytes
+        self.parts = []
+        self.count = 0
+        self._open_part()
+
+    def _open_part(self):
+        self.spool = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES)
+        self.text = io.TextIOWrapper(gzip.GzipFile(fileobj=self.spool, mode='wb'), encoding='utf-8', newline='')
+        self.writer = None
+        if self.fmt == "csv":
+            self.writer = csv.DictWriter(self.text, fieldnames=EXPORT_CSV_FIELDS, extrasaction='ignore')
+            self.writer.writeheader()
+
+    def _close_part(self):
+        self.text.close()  # Fecha o gzip, mas não o arquivo em spool
+        size = self.spool.tell()
+        self.spool.seek(0)
+        self.parts.append((self.spool, size))
+
+    def write(self, record):
+        if self.writer:
+            self.writer.writerow(record)
+        else:
+            self.text.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.count += 1
+        if self.spool.tell() >= self.part_bytes:
+            self._close_part()
+            self._open_part()
+
+    def finish(self):
+        self._close_part()
+        return self.parts
+
+def export_records(tiers, start, end, fmt, part_bytes):
+    """Exporta os registros filtrados por etapa e data (AAAA-MM-DD, inclusivo). Roda fora do event loop.
+
+    Retorna as partes como (arquivo, tamanho) e o total de registros.
+    """
+    writer = ExportWriter(fmt, part_bytes)
+    for tier in tiers:
+        file_path, date_field = EXPORT_SOURCES[tier]
+        for user_id, entry in iter_records(file_path):
+            date = (entry.get(date_field) or "")[:10]
+            if (start and date < start) or (end and date > end):
+                continue
+            if fmt == "csv":
+                record = {"user_id": user_id, "tier": tier, "username": entry.get("username"), "date": date,
+                          "source": entry.get("source"), "project_info": entry.get("project_info")}
+            else:
+                record = {"user_id": user_id, "tier": tier, **entry}
+            writer.write(record)
+    return writer.finish(), writer.count
+
+def group_export_parts(parts, limit_bytes):
+    """Agrupa as partes em mensagens que respeitam o limite de upload e de anexos por mensagem."""
+    groups, group, group_bytes = [], [], 0
+    for part, size in parts:
+        if group and (len(group) >= EXPORT_FILES_PER_MESSAGE or group_bytes + size > limit_bytes):
+            groups.append(group)
+            group, group_bytes = [], 0
+        group.append(part)
+        group_bytes += size
+    if group:
+        groups.append(group)
+    return groups
+
+def parse_export_date(value):
+    return datetime.strptime(value.strip(), "%d/%m/%Y").strftime("%Y-%m-%d") if value else None
+
+def get_onboarding_stats(client: discord.Client) -> OnboardingStats:
+    cog = client.get_cog("RegistrationCog")
+    return cog.stats if cog else OnboardingStats()
+
 async def get_or_create_role(guild: discord.Guild, role_name: str, **kwargs):
     role = discord.utils.get(guild.roles, name=role_name)
     if role is None:
@@ -73,6 +288,9 @@ class NewUserModal(ui.Modal, title="Questionário de Cadastro"):
         if user_id_str in nao_cadastrados_data: del nao_cadastrados_data[user_id_str]
         write_data(CADASTRADOS_FILE, cadastrados_data)
         write_data(NAO_CADASTRADOS_FILE, nao_cadastrados_data)
+        get_onboarding_stats(interaction.client).record(STAGE_CADASTRADO,
+                                                        cadastrados_data[user_id_str]["registration_date"],
+                                                        source=self.source_info.value)
 
         log_channel = await get_or_create_log_channel(guild, LOG_NAO_CLIENTE_CHANNEL)
         embed = discord.Embed(title="📝 Novo Cadastro", color=Color.green(), timestamp=datetime.now())
@@ -101,11 +319,15 @@ class ClientModal(ui.Modal, title="Verificação de Cliente"):
             CADASTRADOS_FILE), read_data(NAO_CADASTRADOS_FILE)
         clientes_data[user_id_str] = {"username": member.name, "project_info": self.project_info.value,
                                       "registration_date": datetime.utcnow().isoformat()}
+        funnel_stages = (STAGE_CLIENTE,) if user_id_str in cadastrados_data else (STAGE_CADASTRADO, STAGE_CLIENTE)
         if user_id_str in cadastrados_data: del cadastrados_data[user_id_str]
         if user_id_str in nao_cadastrados_data: del nao_cadastrados_data[user_id_str]
         write_data(CLIENTES_FILE, clientes_data);
         write_data(CADASTRADOS_FILE, cadastrados_data);
         write_data(NAO_CADASTRADOS_FILE, nao_cadastrados_data)
+        get_onboarding_stats(interaction.client).record(STAGE_CLIENTE,
+                                                        clientes_data[user_id_str]["registration_date"],
+                                                        funnel_stages=funnel_stages)
 
         log_channel = await get_or_create_log_channel(guild, LOG_CLIENTE_CHANNEL)
         embed = discord.Embed(title="⭐ Novo Cliente Verificado", color=Color.gold(), timestamp=datetime.now())
@@ -139,6 +361,13 @@ class RegistrationCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         setup_data_files()
+        state = bot.cog_state.pop(self.qualified_name, None)
+        self.stats = OnboardingStats(data=state["stats"]) if state else OnboardingStats()
+        self.stats.backfill()
+        self.bot.add_view(RegistrationView())
+
+    def cog_unload(self):
+        self.bot.cog_state[self.qualified_name] = {"stats": self.stats.data}
 
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
@@ -153,8 +382,13 @@ class RegistrationCog(commands.Cog):
             await member.add_roles(role)
 
             nao_cadastrados_data = read_data(NAO_CADASTRADOS_FILE)
+            # Quem volta ao servidor já entrou no funil: conta só na entrada diária
+            returning = user_id_str in nao_cadastrados_data or user_id_str in read_data(
+                CADASTRADOS_FILE) or user_id_str in read_data(CLIENTES_FILE)
             nao_cadastrados_data[user_id_str] = {"username": member.name, "join_date": datetime.utcnow().isoformat()}
             write_data(NAO_CADASTRADOS_FILE, nao_cadastrados_data)
+            self.stats.record(STAGE_ENTRADA, nao_cadastrados_data[user_id_str]["join_date"],
+                              funnel_stages=() if returning else None)
 
             log_channel = await get_or_create_log_channel(guild, LOG_ENTRADA_CHANNEL)
             embed = discord.Embed(title="📥 Novo Membro Entrou", description=f"{member.mention} se juntou ao servidor.",
@@ -176,5 +410,88 @@ class RegistrationCog(commands.Cog):
         await interaction.channel.send(embed=embed, view=RegistrationView())
         await interaction.response.send_message("✅ Painel de cadastro criado com sucesso!", ephemeral=True)
 
+    @app_commands.command(name="cadastro_stats", description="Mostra as estatísticas de entrada e cadastro.")
+    @app_commands.default_permissions(administrator=True)
+    async def cadastro_stats(self, interaction: discord.Interaction):
+        data = self.stats.data
+        now = datetime.utcnow()
+        month = now.strftime("%Y-%m")
+        monthly = data["monthly"].get(month, {})
+        last_week = [data["daily"].get((now - timedelta(days=i)).strftime("%Y-%m-%d"), {}) for i in range(7)]
+
+        embed = discord.Embed(title="📊 Estatísticas de Cadastro", color=Color.blurple(), timestamp=datetime.now())
+        embed.add_field(name=f"Este mês ({now.strftime('%m/%Y')})",
+                        value="\n".join(f"**{stage.capitalize()}:** {monthly.get(stage, 0)}" for stage in FUNNEL_STAGES),
+                        inline=True)
+        embed.add_field(name="Últimos 7 dias",
+                        value="\n".join(f"**{stage.capitalize()}:** {sum(day.get(stage, 0) for day in last_week)}"
+                                        for stage in FUNNEL_STAGES),
+                        inline=True)
+
+        monthly_sources = sorted(data["monthly_sources"].get(month, {}).items(), key=lambda item: item[1],
+                                 reverse=True)
+        embed.add_field(name="Origem dos membros (este mês)",
+                        value="\n".join(f"**{bucket}:** {count}" for bucket, count in monthly_sources) or "Sem dados.",
+                        inline=False)
+
+        funnel = data["funnel"]
+        funnel_lines = []
+        for previous, stage in zip((None,) + FUNNEL_STAGES, FUNNEL_STAGES):
+            line = f"**{stage.capitalize()}:** {funnel.get(stage, 0)}"
+            if previous and funnel.get(previous):
+                line += f" ({funnel.get(stage, 0) / funnel[previous]:.1%} de {previous})"
+            funnel_lines.append(line)
+        embed.add_field(name="Funil (total)", value="\n".join(funnel_lines), inline=False)
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="cadastro_export", description="Exporta os cadastros em CSV ou JSONL comprimido.")
+    @app_commands.describe(tipo="Quais cadastros exportar", formato="Formato do arquivo",
+                           de="Data inicial (DD/MM/AAAA)", ate="Data final (DD/MM/AAAA)")
+    @app_commands.choices(
+        tipo=[app_commands.Choice(name="Todos", value="todos"),
+              app_commands.Choice(name="Não cadastrados", value=STAGE_ENTRADA),
+              app_commands.Choice(name="Cadastrados", value=STAGE_CADASTRADO),
+              app_commands.Choice(name="Clientes", value=STAGE_CLIENTE)],
+        formato=[app_commands.Choice(name="CSV", value="csv"),
+                 app_commands.Choice(name="JSONL", value="jsonl")])
+    @app_commands.default_permissions(administrator=True)
+    async def cadastro_export(self, interaction: discord.Interaction, tipo: str = "todos", formato: str = "csv",
+                              de: str = None, ate: str = None):
+        try:
+            start, end = parse_export_date(de), parse_export_date(ate)
+        except ValueError:
+            await interaction.response.send_message("❌ Data inválida! Use o formato DD/MM/AAAA.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        tiers = FUNNEL_STAGES if tipo == "todos" else (tipo,)
+        limit_bytes = interaction.guild.filesize_limit
+        part_bytes = max(limit_bytes - EXPORT_PART_MARGIN_BYTES, limit_bytes // 2)
+        try:
+            parts, count = await asyncio.to_thread(export_records, tiers, start, end, formato, part_bytes)
+        except Exception as e:
+            print(f"Erro ao exportar cadastros: {e}")
+            await interaction.followup.send(f"❌ **Erro ao exportar os cadastros:** {str(e)}\n"
+                                            f"Tente novamente em alguns instantes.", ephemeral=True)
+            return
+
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        try:
+            groups = group_export_parts(parts, limit_bytes)
+            content = f"📦 {count} registros exportados em {len(parts)} arquivo(s)."
+            if ijson is None:
+                content += "\n⚠️ `ijson` não está instalado: os arquivos foram carregados inteiros na memória."
+            number = 1
+            for i, group in enumerate(groups):
+                files = []
+                for part in group:
+                    files.append(discord.File(part, filename=f"cadastros-{tipo}-{stamp}-parte{number}.{formato}.gz"))
+                    number += 1
+                await interaction.followup.send(content=content if i == 0 else None, files=files, ephemeral=True)
+        finally:
+            for part, _ in parts:
+                part.close()
+
 async def setup(bot: commands.Cog):
     await bot.add_cog(RegistrationCog(bot))
\ No newline at end of file
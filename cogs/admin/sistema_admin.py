@@ -0,0 +1,100 @@
+import discord
+from discord.ext import commands
+from discord import app_commands, Color
+from datetime import datetime
+from collections import Counter
+import os
+import io
+import sys
+import time
+import asyncio
+
+PROFILE_SAMPLE_INTERVAL = 0.005  # segundos entre amostras do profiler
+PROFILE_MAX_SECONDS = 60
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+
+def sample_stacks(thread_id: int, duration: float, interval: float = PROFILE_SAMPLE_INTERVAL) -> Counter:
+    """Amostra a pilha de uma thread por `duration` segundos. Deve rodar fora da thread amostrada."""
+    samples = Counter()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        stack = []
+        while frame is not None:
+            stack.append(frame_label(frame))
+            frame = frame.f_back
+        if stack:
+            samples[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return samples
+
+
+def collapse_samples(samples: Counter) -> str:
+    """Formato "collapsed stack" aceito por flamegraph.pl e speedscope."""
+    return "\n".join(f"{stack} {count}" for stack, count in samples.most_common()) + "\n"
+
+
+class AdminCog(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.profile_lock = asyncio.Lock()
+
+    @app_commands.command(name="recarregar", description="Recarrega um cog sem reiniciar o bot.")
+    @app_commands.describe(extensao="Cog a ser recarregado, ex: cogs.brefing.forms")
+    @app_commands.default_permissions(administrator=True)
+    async def recarregar(self, interaction: discord.Interaction, extensao: str):
+        if extensao not in self.bot.extensions:
+            await interaction.response.send_message(f"❌ O cog `{extensao}` não está carregado.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        try:
+            elapsed, synced = await self.bot.reload_cog(extensao)
+        except Exception as e:
+            await interaction.followup.send(f"❌ Erro ao recarregar `{extensao}`: {str(e)}", ephemeral=True)
+            return
+
+        embed = discord.Embed(title="🔄 Cog Recarregado", color=Color.green(), timestamp=datetime.now())
+        embed.add_field(name="Cog", value=f"`{extensao}`", inline=False)
+        embed.add_field(name="Tempo", value=f"{elapsed:.0f}ms", inline=True)
+        embed.add_field(name="Comandos", value="Sincronizados" if synced else "Sem alterações", inline=True)
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="perfil", description="Amostra o bot em execução e gera um arquivo para flamegraph.")
+    @app_commands.describe(segundos="Duração da amostragem, em segundos")
+    @app_commands.default_permissions(administrator=True)
+    async def perfil(self, interaction: discord.Interaction,
+                     segundos: app_commands.Range[int, 1, PROFILE_MAX_SECONDS] = 10):
+        if self.profile_lock.locked():
+            await interaction.response.send_message("❌ Já existe uma amostragem em andamento.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        async with self.profile_lock:
+            samples = await asyncio.to_thread(sample_stacks, self.bot.loop_thread_id, segundos)
+
+        profile_file = discord.File(
+            io.BytesIO(collapse_samples(samples).encode('utf-8')),
+            filename=f"perfil-{datetime.now().strftime('%Y%m%d-%H%M%S')}.folded"
+        )
+        embed = discord.Embed(title="🔥 Perfil do Bot", color=Color.orange(), timestamp=datetime.now())
+        embed.add_field(name="Duração", value=f"{segundos}s", inline=True)
+        embed.add_field(name="Amostras", value=str(sum(samples.values())), inline=True)
+        embed.add_field(name="Atraso do loop", value=f"{self.bot.loop_lag * 1000:.0f}ms "
+                                                     f"(máx. {self.bot.max_loop_lag * 1000:.0f}ms)", inline=True)
+        embed.set_footer(text="Abra o arquivo em speedscope.app ou com flamegraph.pl")
+        await interaction.followup.send(embed=embed, file=profile_file, ephemeral=True)
+
+    @recarregar.autocomplete("extensao")
+    async def recarregar_autocomplete(self, interaction: discord.Interaction, current: str):
+        return [app_commands.Choice(name=name, value=name)
+                for name in sorted(self.bot.extensions) if current.lower() in name.lower()][:25]
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(AdminCog(bot))
@@ -4,6 +4,9 @@ from discord import app_commands, ui, ButtonStyle, Color
 from datetime import datetime
 import os
 import io
+import json
+import time
+import heapq
 import asyncio
 
 # Tente importar o chat_exporter, se não funcionar, usaremos uma alternativa
@@ -15,6 +18,139 @@ except ImportError:
 OWNER_USER_ID = 1186410533335863403
 TICKET_CATEGORY_NAME = "Orçamentos"
 LOG_TICKETS_CHANNEL_NAME = "logs-tickets"
+TICKET_CHANNEL_PREFIX = "orcamento-"
+
+# Fechamento automático de tickets inativos
+TICKET_IDLE_WARNING_SECONDS = 48 * 60 * 60  # Inatividade até o aviso
+TICKET_IDLE_CLOSE_SECONDS = 24 * 60 * 60  # Tempo após o aviso até o fechamento
+TICKET_CLOSE_CONCURRENCY = 3  # Fechamentos (transcrição + exclusão) simultâneos
+TICKET_CLOSE_RETRY_SECONDS = 60 * 60  # Nova tentativa quando um fechamento automático falha
+STAGE_WARNING = "aviso"
+STAGE_CLOSE = "fechamento"
+TICKET_DEADLINES_FILE = os.path.join("data", "tickets", "prazos.json")
+
+
+def load_ticket_deadlines():
+    try:
+        with open(TICKET_DEADLINES_FILE, 'r', encoding='utf-8') as f:
+            return {int(channel_id): tuple(value) for channel_id, value in json.load(f).items()}
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_ticket_deadlines(ticket_deadlines):
+    """Salva só os prazos de fechamento: os de aviso são reconstruídos pelo last_message_id no on_ready."""
+    os.makedirs(os.path.dirname(TICKET_DEADLINES_FILE), exist_ok=True)
+    with open(TICKET_DEADLINES_FILE, 'w', encoding='utf-8') as f:
+        json.dump({str(channel_id): list(value) for channel_id, value in ticket_deadlines.items()
+                   if value[1] == STAGE_CLOSE}, f, indent=4)
+
+
+async def get_or_create_ticket_log_channel(guild: discord.Guild):
+    category = discord.utils.get(guild.categories, name=TICKET_CATEGORY_NAME)
+    log_channel = discord.utils.get(category.text_channels, name=LOG_TICKETS_CHANNEL_NAME) if category else None
+
+    if not log_channel and category:
+        try:
+            log_channel = await category.create_text_channel(
+                LOG_TICKETS_CHANNEL_NAME,
+                overwrites={
+                    guild.default_role: discord.PermissionOverwrite(view_channel=False),
+                    guild.me: discord.PermissionOverwrite(view_channel=True, send_messages=True)
+                }
+            )
+        except Exception as e:
+            print(f"Erro ao criar canal de logs: {e}")
+
+    elif not log_channel and not category:
+        try:
+            overwrites = {guild.default_role: discord.PermissionOverwrite(view_channel=False)}
+            category = await guild.create_category(TICKET_CATEGORY_NAME, overwrites=overwrites)
+            log_channel = await category.create_text_channel(
+                LOG_TICKETS_CHANNEL_NAME,
+                overwrites={
+                    guild.default_role: discord.PermissionOverwrite(view_channel=False),
+                    guild.me: discord.PermissionOverwrite(view_channel=True, send_messages=True)
+                }
+            )
+        except Exception as e:
+            print(f"Erro ao criar categoria e canal de logs: {e}")
+
+    return log_channel
+
+
+async def close_ticket(ticket_channel: discord.TextChannel, log_channel, closed_by, client: discord.Client,
+                       reason: str, should_abort=None):
+    """Salva a transcrição do ticket no canal de logs e apaga o canal.
+
+    `should_abort` é consultado antes da transcrição e de novo antes de apagar o canal; se retornar True,
+    o ticket é mantido (com um aviso nos logs caso a transcrição já tenha sido enviada).
+    """
+    if should_abort and should_abort():
+        return
+    if log_channel:
+        try:
+            # Primeira tentativa com chat_exporter
+            if chat_exporter:
+                transcript = await chat_exporter.export(
+                    ticket_channel,
+                    limit=None,
+                    tz_info="UTC",
+                    guild=ticket_channel.guild,
+                    bot=client
+                )
+
+                if transcript:
+                    transcript_file = discord.File(
+                        io.BytesIO(transcript.encode()),
+                        filename=f"transcript-{ticket_channel.name}.html"
+                    )
+                    await log_channel.send(
+                        content=f"📋 Transcrição do ticket fechado `{ticket_channel.name}` por {closed_by.mention}:",
+                        file=transcript_file
+                    )
+                else:
+                    # Fallback para transcrição manual
+                    await create_manual_transcript(log_channel, ticket_channel, closed_by)
+            else:
+                # Fallback para transcrição manual
+                await create_manual_transcript(log_channel, ticket_channel, closed_by)
+
+        except Exception as e:
+            print(f"Erro ao criar transcrição: {e}")
+            await create_manual_transcript(log_channel, ticket_channel, closed_by)
+
+    if should_abort and should_abort():
+        if log_channel:
+            await log_channel.send(f"↩️ O fechamento de `{ticket_channel.name}` foi cancelado por nova atividade; "
+                                   f"a transcrição acima não é final e o ticket continua aberto.")
+        return
+    await ticket_channel.delete(reason=reason)
+
+
+async def create_manual_transcript(log_channel, channel, closed_by):
+    """Cria uma transcrição manual simples"""
+    messages = []
+    async for message in channel.history(limit=None, oldest_first=True):
+        timestamp = message.created_at.strftime("%d/%m/%Y %H:%M:%S")
+        content = message.clean_content or "[Embed/Anexo]"
+        messages.append(f"[{timestamp}] {message.author.name}: {content}")
+
+    transcript_content = f"=== TRANSCRIÇÃO DO TICKET {channel.name.upper()} ===\n"
+    transcript_content += f"Fechado por: {closed_by.name}\n"
+    transcript_content += f"Data de fechamento: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n"
+    transcript_content += "=" * 50 + "\n\n"
+    transcript_content += "\n".join(messages)
+
+    transcript_file = discord.File(
+        io.BytesIO(transcript_content.encode('utf-8')),
+        filename=f"transcript-{channel.name}.txt"
+    )
+
+    await log_channel.send(
+        content=f"📋 Transcrição do ticket fechado `{channel.name}` por {closed_by.mention}:",
+        file=transcript_file
+    )
 
 
 class ConfirmCloseView(ui.View):
@@ -25,65 +161,8 @@ class ConfirmCloseView(ui.View):
     @ui.button(label="Confirmar Fechamento", style=ButtonStyle.danger, custom_id="confirm_close_ticket_html")
     async def confirm_button(self, interaction: discord.Interaction, button: ui.Button):
         await interaction.response.send_message("Fechando o ticket e gerando a transcrição...", ephemeral=True)
-        ticket_channel = interaction.channel
-
-        if self.log_channel:
-            try:
-                # Primeira tentativa com chat_exporter
-                if chat_exporter:
-                    transcript = await chat_exporter.export(
-                        ticket_channel,
-                        limit=None,
-                        tz_info="UTC",
-                        guild=interaction.guild,
-                        bot=interaction.client
-                    )
-
-                    if transcript:
-                        transcript_file = discord.File(
-                            io.BytesIO(transcript.encode()),
-                            filename=f"transcript-{ticket_channel.name}.html"
-                        )
-                        await self.log_channel.send(
-                            content=f"📋 Transcrição do ticket fechado `{ticket_channel.name}` por {interaction.user.mention}:",
-                            file=transcript_file
-                        )
-                    else:
-                        # Fallback para transcrição manual
-                        await self.create_manual_transcript(ticket_channel, interaction.user)
-                else:
-                    # Fallback para transcrição manual
-                    await self.create_manual_transcript(ticket_channel, interaction.user)
-
-            except Exception as e:
-                print(f"Erro ao criar transcrição: {e}")
-                await self.create_manual_transcript(ticket_channel, interaction.user)
-
-        await ticket_channel.delete(reason=f"Ticket fechado por {interaction.user.name}")
-
-    async def create_manual_transcript(self, channel, closed_by):
-        """Cria uma transcrição manual simples"""
-        messages = []
-        async for message in channel.history(limit=None, oldest_first=True):
-            timestamp = message.created_at.strftime("%d/%m/%Y %H:%M:%S")
-            content = message.clean_content or "[Embed/Anexo]"
-            messages.append(f"[{timestamp}] {message.author.name}: {content}")
-
-        transcript_content = f"=== TRANSCRIÇÃO DO TICKET {channel.name.upper()} ===\n"
-        transcript_content += f"Fechado por: {closed_by.name}\n"
-        transcript_content += f"Data de fechamento: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n"
-        transcript_content += "=" * 50 + "\n\n"
-        transcript_content += "\n".join(messages)
-
-        transcript_file = discord.File(
-            io.BytesIO(transcript_content.encode('utf-8')),
-            filename=f"transcript-{channel.name}.txt"
-        )
-
-        await self.log_channel.send(
-            content=f"📋 Transcrição do ticket fechado `{channel.name}` por {closed_by.mention}:",
-            file=transcript_file
-        )
+        await close_ticket(interaction.channel, self.log_channel, interaction.user, interaction.client,
+                           reason=f"Ticket fechado por {interaction.user.name}")
 
     @ui.button(label="Cancelar", style=ButtonStyle.secondary, custom_id="cancel_close_ticket_html")
     async def cancel_button(self, interaction: discord.Interaction, button: ui.Button):
@@ -98,39 +177,12 @@ class TicketActionsView(ui.View):
     @ui.button(label="Fechar Ticket", style=ButtonStyle.danger, custom_id="ticket_close_html", emoji="🔒")
     async def close_ticket_button(self, interaction: discord.Interaction, button: ui.Button):
         # Verificar se é realmente um canal de ticket
-        if not interaction.channel.name.startswith("orcamento-"):
+        if not interaction.channel.name.startswith(TICKET_CHANNEL_PREFIX):
             await interaction.response.send_message("❌ Este comando só pode ser usado em canais de ticket!",
                                                     ephemeral=True)
             return
 
-        category = discord.utils.get(interaction.guild.categories, name=TICKET_CATEGORY_NAME)
-        log_channel = discord.utils.get(category.text_channels, name=LOG_TICKETS_CHANNEL_NAME) if category else None
-
-        if not log_channel and category:
-            try:
-                log_channel = await category.create_text_channel(
-                    LOG_TICKETS_CHANNEL_NAME,
-                    overwrites={
-                        interaction.guild.default_role: discord.PermissionOverwrite(view_channel=False),
-                        interaction.guild.me: discord.PermissionOverwrite(view_channel=True, send_messages=True)
-                    }
-                )
-            except Exception as e:
-                print(f"Erro ao criar canal de logs: {e}")
-
-        elif not log_channel and not category:
-            try:
-                overwrites = {interaction.guild.default_role: discord.PermissionOverwrite(view_channel=False)}
-                category = await interaction.guild.create_category(TICKET_CATEGORY_NAME, overwrites=overwrites)
-                log_channel = await category.create_text_channel(
-                    LOG_TICKETS_CHANNEL_NAME,
-                    overwrites={
-                        interaction.guild.default_role: discord.PermissionOverwrite(view_channel=False),
-                        interaction.guild.me: discord.PermissionOverwrite(view_channel=True, send_messages=True)
-                    }
-                )
-            except Exception as e:
-                print(f"Erro ao criar categoria e canal de logs: {e}")
+        log_channel = await get_or_create_ticket_log_channel(interaction.guild)
 
         await interaction.response.send_message(
             "🚨 **Você tem certeza que deseja fechar este ticket?**\n\n"
@@ -144,7 +196,7 @@ class TicketActionsView(ui.View):
     @ui.button(label="Adicionar Membro", style=ButtonStyle.primary, custom_id="ticket_add_member", emoji="➕")
     async def add_member_button(self, interaction: discord.Interaction, button: ui.Button):
         # Verificar se é realmente um canal de ticket
-        if not interaction.channel.name.startswith("orcamento-"):
+        if not interaction.channel.name.startswith(TICKET_CHANNEL_PREFIX):
             await interaction.response.send_message("❌ Este comando só pode ser usado em canais de ticket!",
                                                     ephemeral=True)
             return
@@ -154,7 +206,7 @@ class TicketActionsView(ui.View):
     @ui.button(label="Remover Membro", style=ButtonStyle.secondary, custom_id="ticket_remove_member", emoji="➖")
     async def remove_member_button(self, interaction: discord.Interaction, button: ui.Button):
         # Verificar se é realmente um canal de ticket
-        if not interaction.channel.name.startswith("orcamento-"):
+        if not interaction.channel.name.startswith(TICKET_CHANNEL_PREFIX):
             await interaction.response.send_message("❌ Este comando só pode ser usado em canais de ticket!",
                                                     ephemeral=True)
             return
@@ -396,6 +448,130 @@ class FormsCog(commands.Cog):
         self.bot.add_view(BriefingView())
         self.bot.add_view(TicketActionsView())
 
+        # Prazo atual de cada ticket: {channel_id: (deadline, etapa)}; os prazos de fechamento ficam em disco
+        # para sobreviver a reinícios. O heap guarda os mesmos prazos ordenados; entradas desatualizadas são descartadas
+        # quando chegam ao topo.
+        state = bot.cog_state.pop(self.qualified_name, None)
+        self.ticket_deadlines = state["ticket_deadlines"] if state else load_ticket_deadlines()
+        self.deadline_heap = [(deadline, channel_id, stage)
+                              for channel_id, (deadline, stage) in self.ticket_deadlines.items()]
+        heapq.heapify(self.deadline_heap)
+        self.deadline_changed = asyncio.Event()
+        self.close_semaphore = asyncio.Semaphore(TICKET_CLOSE_CONCURRENCY)
+        self.close_tasks = set()
+        self.sweeper_task = None
+
+    async def cog_load(self):
+        self.sweeper_task = asyncio.create_task(self.inactivity_sweeper())
+
+    def cog_unload(self):
+        if self.sweeper_task:
+            self.sweeper_task.cancel()
+        self.bot.cog_state[self.qualified_name] = {"ticket_deadlines": self.ticket_deadlines}
+
+    def schedule_ticket(self, channel_id: int, deadline: float, stage: str = STAGE_WARNING):
+        previous = self.ticket_deadlines.get(channel_id)
+        self.ticket_deadlines[channel_id] = (deadline, stage)
+        # Mensagens que só adiam um prazo de aviso não tocam no disco
+        if stage == STAGE_CLOSE or (previous and previous[1] == STAGE_CLOSE):
+            save_ticket_deadlines(self.ticket_deadlines)
+        heapq.heappush(self.deadline_heap, (deadline, channel_id, stage))
+        if len(self.deadline_heap) > 2 * len(self.ticket_deadlines) + 64:
+            # Compacta o heap quando as entradas desatualizadas dominam (tickets com muitas mensagens)
+            self.deadline_heap = [(d, c, st) for c, (d, st) in self.ticket_deadlines.items()]
+            heapq.heapify(self.deadline_heap)
+        if self.deadline_heap[0][1] == channel_id:
+            self.deadline_changed.set()
+
+    async def inactivity_sweeper(self):
+        """Dorme até o prazo mais próximo vencer, sem varrer os tickets periodicamente."""
+        await self.bot.wait_until_ready()
+        while True:
+            self.deadline_changed.clear()
+            timeout = self.deadline_heap[0][0] - time.time() if self.deadline_heap else None
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self.deadline_changed.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            deadline, channel_id, stage = heapq.heappop(self.deadline_heap)
+            if self.ticket_deadlines.get(channel_id) != (deadline, stage):
+                continue  # Prazo substituído por atividade mais recente
+
+            channel = self.bot.get_channel(channel_id)
+            if channel is None:
+                del self.ticket_deadlines[channel_id]
+                if stage == STAGE_CLOSE:
+                    save_ticket_deadlines(self.ticket_deadlines)
+            elif stage == STAGE_WARNING:
+                await self.warn_idle_ticket(channel)
+            else:
+                # Sai do dicionário: se houver atividade enquanto o fechamento aguarda, on_message o recoloca
+                del self.ticket_deadlines[channel_id]
+                save_ticket_deadlines(self.ticket_deadlines)
+                task = asyncio.create_task(self.close_idle_ticket(channel))
+                self.close_tasks.add(task)
+                task.add_done_callback(self.close_tasks.discard)
+
+    async def warn_idle_ticket(self, channel: discord.TextChannel):
+        self.schedule_ticket(channel.id, time.time() + TICKET_IDLE_CLOSE_SECONDS, STAGE_CLOSE)
+        embed = discord.Embed(
+            title="⏰ Ticket Inativo",
+            description=f"Este ticket está sem atividade há {TICKET_IDLE_WARNING_SECONDS // 3600} horas.\n\n"
+                        f"Ele será **fechado automaticamente** em {TICKET_IDLE_CLOSE_SECONDS // 3600} horas "
+                        f"caso nenhuma mensagem seja enviada.",
+            color=Color.orange(),
+            timestamp=datetime.now()
+        )
+        try:
+            await channel.send(embed=embed)
+        except discord.HTTPException as e:
+            print(f"Erro ao avisar o ticket inativo {channel.name}: {e}")
+
+    async def close_idle_ticket(self, channel: discord.TextChannel):
+        async with self.close_semaphore:
+            if channel.id in self.ticket_deadlines:
+                return  # Houve atividade enquanto o fechamento aguardava na fila
+            try:
+                log_channel = await get_or_create_ticket_log_channel(channel.guild)
+                await close_ticket(channel, log_channel, channel.guild.me, self.bot,
+                                   reason="Ticket fechado automaticamente por inatividade",
+                                   should_abort=lambda: channel.id in self.ticket_deadlines)
+            except Exception as e:
+                print(f"Erro ao fechar o ticket inativo {channel.name}: {e}")
+                if channel.id not in self.ticket_deadlines and self.bot.get_channel(channel.id):
+                    self.schedule_ticket(channel.id, time.time() + TICKET_CLOSE_RETRY_SECONDS, STAGE_CLOSE)
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Tickets sem prazo de fechamento salvo: a última atividade vem do ID da última mensagem, sem chamadas
+        # à API. Tickets avisados já estão no arquivo, então a mensagem de aviso do bot não reinicia o prazo.
+        for guild in self.bot.guilds:
+            for channel in guild.text_channels:
+                if channel.name.startswith(TICKET_CHANNEL_PREFIX) and channel.id not in self.ticket_deadlines:
+                    last_activity = discord.utils.snowflake_time(channel.last_message_id or channel.id)
+                    self.schedule_ticket(channel.id, last_activity.timestamp() + TICKET_IDLE_WARNING_SECONDS)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel):
+        if isinstance(channel, discord.TextChannel) and channel.name.startswith(TICKET_CHANNEL_PREFIX):
+            self.schedule_ticket(channel.id, time.time() + TICKET_IDLE_WARNING_SECONDS)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        removed = self.ticket_deadlines.pop(channel.id, None)
+        if removed and removed[1] == STAGE_CLOSE:
+            save_ticket_deadlines(self.ticket_deadlines)
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if message.author.bot or not isinstance(message.channel, discord.TextChannel):
+            return
+        if message.channel.name.startswith(TICKET_CHANNEL_PREFIX):
+            self.schedule_ticket(message.channel.id, time.time() + TICKET_IDLE_WARNING_SECONDS)
+
     @app_commands.command(name="forms", description="Cria o painel para solicitação de orçamentos.")
     @app_commands.default_permissions(administrator=True)
     async def forms(self, interaction: discord.Interaction):
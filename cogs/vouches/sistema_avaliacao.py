@@ -1,14 +1,186 @@
 import discord
 from discord.ext import commands
 from discord import app_commands, ui, ButtonStyle, Color
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import os
+import json
 
 ROLE_CLIENTE = "Cliente"
 VOUCH_CATEGORY_NAME = "AVALIAÇÕES / VOUCHES"
 APPROVAL_CHANNEL_NAME = "aprovar-avaliacao"
 PUBLIC_VOUCHES_CHANNEL_NAME = "avaliacoes-vouches"
 
+DATA_DIR = os.path.join("data", "vouches")
+PENDING_VOUCHES_FILE = os.path.join(DATA_DIR, "pendentes.json")
+
+QUEUE_PAGE_SIZE = 25  # Limite de opções de um Select do Discord
+EMBEDS_PER_MESSAGE = 10  # Limite de embeds por mensagem
+EMBED_CHARS_PER_MESSAGE = 6000  # Limite de caracteres somando todos os embeds de uma mensagem
+QUEUE_PREVIEW_CHARS = 150  # Prévia do comentário na fila, para a página caber num embed
+BULK_DELETE_LIMIT = 100  # Limite de mensagens por chamada de bulk delete
+BULK_DELETE_MAX_AGE = timedelta(days=14)  # Mensagens mais antigas não podem ser apagadas em lote
+
+
+class VouchQueue:
+    """Fila de avaliações pendentes, indexada pelo ID da mensagem de aprovação."""
+
+    def __init__(self, file_path=PENDING_VOUCHES_FILE, pending=None):
+        self.file_path = file_path
+        self.pending = pending if pending is not None else self._load()
+        # IDs retirados da fila cuja publicação ainda está em andamento
+        self.in_progress = set()
+
+    def _load(self):
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        with open(self.file_path, 'w', encoding='utf-8') as f:
+            json.dump(self.pending, f, indent=4, ensure_ascii=False)
+
+    def __len__(self):
+        return len(self.pending)
+
+    def add(self, message: discord.Message, author: discord.abc.User, star_rating: int, comment: str,
+            embed: discord.Embed):
+        self.pending[str(message.id)] = {"channel_id": message.channel.id, "author_id": author.id,
+                                         "author_name": author.name, "stars": star_rating, "comment": comment,
+                                         "created_at": datetime.utcnow().isoformat(), "embed": embed.to_dict()}
+        self.save()
+
+    def pop_many(self, message_ids):
+        entries = {}
+        for message_id in message_ids:
+            entry = self.pending.pop(str(message_id), None)
+            if entry is not None:
+                entries[str(message_id)] = entry
+        if entries:
+            self.save()
+        return entries
+
+    def claim(self, message_ids):
+        """Retira da fila, na ordem de envio, as avaliações indicadas e as marca como em andamento."""
+        wanted = {str(message_id) for message_id in message_ids}
+        entries = [(message_id, entry) for message_id, entry in self.pending.items() if message_id in wanted]
+        self.pop_many(message_id for message_id, _ in entries)
+        self.in_progress.update(message_id for message_id, _ in entries)
+        return entries
+
+    def release(self, entries, requeue=False):
+        """Encerra avaliações em andamento; com `requeue`, devolve-as à frente da fila."""
+        self.in_progress.difference_update(message_id for message_id, _ in entries)
+        if requeue and entries:
+            restored = dict(entries)
+            restored.update(self.pending)
+            self.pending.clear()
+            self.pending.update(restored)
+            self.save()
+
+    def page_count(self):
+        return max(1, -(-len(self.pending) // QUEUE_PAGE_SIZE))
+
+    def page(self, index: int):
+        start = index * QUEUE_PAGE_SIZE
+        return list(self.pending.items())[start:start + QUEUE_PAGE_SIZE]
+
+
+def get_vouch_queue(client: discord.Client) -> VouchQueue:
+    cog = client.get_cog("VouchCog")
+    return cog.queue if cog else VouchQueue()
+
+
+def build_public_embed(approval_embed: discord.Embed) -> discord.Embed:
+    public_embed = approval_embed.copy()
+    public_embed.title = "Nova Avaliação de Cliente!"
+    public_embed.color = Color.blue()
+    return public_embed
+
+
+async def delete_approval_messages(channel: discord.TextChannel, message_ids):
+    """Apaga as mensagens de aprovação em lote, caindo para exclusão individual quando necessário."""
+    cutoff = datetime.now(timezone.utc) - BULK_DELETE_MAX_AGE
+    recent = [discord.Object(id=int(m)) for m in message_ids if discord.utils.snowflake_time(int(m)) > cutoff]
+    old = [int(m) for m in message_ids if discord.utils.snowflake_time(int(m)) <= cutoff]
+
+    for i in range(0, len(recent), BULK_DELETE_LIMIT):
+        chunk = recent[i:i + BULK_DELETE_LIMIT]
+        try:
+            await channel.delete_messages(chunk, reason="Moderação de avaliações em lote")
+        except discord.HTTPException:
+            # Alguma mensagem já foi apagada manualmente; tenta uma por uma
+            old.extend(m.id for m in chunk)
+
+    for message_id in old:
+        try:
+            await channel.get_partial_message(message_id).delete()
+        except discord.NotFound:
+            pass
+
+
+def batch_public_embeds(entries):
+    """Agrupa as avaliações em mensagens respeitando os limites de embeds e de caracteres por mensagem."""
+    batches, batch, batch_chars = [], [], 0
+    for message_id, entry in entries:
+        embed = build_public_embed(discord.Embed.from_dict(entry["embed"]))
+        if batch and (len(batch) >= EMBEDS_PER_MESSAGE or batch_chars + len(embed) > EMBED_CHARS_PER_MESSAGE):
+            batches.append(batch)
+            batch, batch_chars = [], 0
+        batch.append((message_id, entry, embed))
+        batch_chars += len(embed)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+async def delete_queued_messages(guild: discord.Guild, entries):
+    """Apaga as mensagens de aprovação sem propagar erros: a avaliação já foi resolvida."""
+    by_channel = {}
+    for message_id, entry in entries:
+        by_channel.setdefault(entry["channel_id"], []).append(message_id)
+    for channel_id, ids in by_channel.items():
+        channel = guild.get_channel(channel_id)
+        if channel:
+            try:
+                await delete_approval_messages(channel, ids)
+            except discord.HTTPException as e:
+                print(f"Erro ao apagar mensagens de aprovação em {channel.name}: {e}")
+
+
+async def resolve_vouches(guild: discord.Guild, queue: VouchQueue, message_ids, approve: bool):
+    """Aprova ou reprova várias avaliações de uma vez. Retorna quantas foram processadas.
+
+    As avaliações saem da fila antes de qualquer await, para que não sejam publicadas duas vezes; um lote
+    só volta para a fila se o seu envio falhar.
+    """
+    entries = queue.claim(message_ids)
+    if not entries:
+        return 0
+
+    if not approve:
+        await delete_queued_messages(guild, entries)
+        queue.release(entries)
+        return len(entries)
+
+    batches = batch_public_embeds(entries)
+    resolved = 0
+    try:
+        vouch_channel = await get_or_create_vouch_channel(guild, PUBLIC_VOUCHES_CHANNEL_NAME)
+        while batches:
+            batch = [(message_id, entry) for message_id, entry, _ in batches[0]]
+            await vouch_channel.send(embeds=[embed for _, _, embed in batches[0]])
+            batches.pop(0)
+            queue.release(batch)
+            resolved += len(batch)
+            await delete_queued_messages(guild, batch)
+    except Exception:
+        queue.release([(message_id, entry) for batch in batches for message_id, entry, _ in batch], requeue=True)
+        raise
+    return resolved
+
 
 async def get_or_create_vouch_channel(guild: discord.Guild, channel_name: str):
     category = discord.utils.get(guild.categories, name=VOUCH_CATEGORY_NAME)
@@ -32,20 +204,35 @@ class ApprovalView(ui.View):
 
     @ui.button(label="Aprovar", style=ButtonStyle.success, custom_id="vouch_approve")
     async def approve_button(self, interaction: discord.Interaction, button: ui.Button):
-        original_embed = interaction.message.embeds[0]
-
-        public_embed = original_embed.copy()
-        public_embed.title = "Nova Avaliação de Cliente!"
-        public_embed.color = Color.blue()
+        queue = get_vouch_queue(interaction.client)
+        if str(interaction.message.id) in queue.in_progress:
+            await interaction.response.send_message("⏳ Esta avaliação já está sendo processada.", ephemeral=True)
+            return
+        # Mensagens anteriores à fila não estão nela, mas continuam podendo ser aprovadas pelo botão
+        entries = queue.claim([interaction.message.id])
 
-        vouch_channel = await get_or_create_vouch_channel(interaction.guild, PUBLIC_VOUCHES_CHANNEL_NAME)
+        public_embed = build_public_embed(interaction.message.embeds[0])
+        try:
+            vouch_channel = await get_or_create_vouch_channel(interaction.guild, PUBLIC_VOUCHES_CHANNEL_NAME)
+            await vouch_channel.send(embed=public_embed)
+        except Exception:
+            queue.release(entries, requeue=True)
+            raise
+        queue.release(entries)
 
-        await vouch_channel.send(embed=public_embed)
-        await interaction.message.delete()
+        try:
+            await interaction.message.delete()
+        except discord.HTTPException as e:
+            print(f"Erro ao apagar a mensagem de aprovação: {e}")
         await interaction.response.send_message("✅ Avaliação aprovada e publicada!", ephemeral=True)
 
     @ui.button(label="Reprovar", style=ButtonStyle.danger, custom_id="vouch_reject")
     async def reject_button(self, interaction: discord.Interaction, button: ui.Button):
+        queue = get_vouch_queue(interaction.client)
+        if str(interaction.message.id) in queue.in_progress:
+            await interaction.response.send_message("⏳ Esta avaliação já está sendo processada.", ephemeral=True)
+            return
+        queue.pop_many([interaction.message.id])
         await interaction.message.delete()
         await interaction.response.send_message("🗑️ Avaliação reprovada e excluída.", ephemeral=True)
 
@@ -77,7 +264,100 @@ class VouchModal(ui.Modal, title="Deixe seu Feedback"):
         embed.add_field(name=f"Avaliação ({self.star_rating} {star_label})", value=stars_text, inline=False)
         embed.add_field(name="Comentário", value=f"> {self.comment.value}", inline=False)
 
-        await approval_channel.send(embed=embed, view=ApprovalView())
+        message = await approval_channel.send(embed=embed, view=ApprovalView())
+        get_vouch_queue(interaction.client).add(message, interaction.user, self.star_rating, self.comment.value, embed)
+
+
+class VouchQueueSelect(ui.Select['VouchQueueView']):
+    def __init__(self, entries, selected):
+        options = [
+            discord.SelectOption(label=f"{'⭐' * entry['stars']} {entry['author_name']}"[:100],
+                                 description=entry["comment"][:100], value=message_id,
+                                 default=message_id in selected)
+            for message_id, entry in entries
+        ]
+        super().__init__(placeholder="Selecione as avaliações...", min_values=0, max_values=len(options),
+                         options=options)
+
+    async def callback(self, interaction: discord.Interaction):
+        page_ids = {option.value for option in self.options}
+        self.view.selected = (self.view.selected - page_ids) | set(self.values)
+        await interaction.response.edit_message(embed=self.view.build_embed(), view=self.view)
+
+
+class VouchQueueView(ui.View):
+    def __init__(self, queue: VouchQueue):
+        super().__init__(timeout=300)
+        self.queue = queue
+        self.page = 0
+        self.selected = set()
+        self.refresh()
+
+    def refresh(self):
+        self.page = min(self.page, self.queue.page_count() - 1)
+        self.selected &= set(self.queue.pending)
+        self.clear_items()
+
+        entries = self.queue.page(self.page)
+        if entries:
+            self.add_item(VouchQueueSelect(entries, self.selected))
+
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= self.queue.page_count() - 1
+        self.approve_selected.disabled = self.reject_selected.disabled = not self.selected
+        for item in (self.previous_page, self.next_page, self.approve_selected, self.reject_selected):
+            self.add_item(item)
+
+    def build_embed(self):
+        embed = discord.Embed(title="📋 Fila de Avaliações Pendentes", color=Color.orange())
+        entries = self.queue.page(self.page)
+        if not entries:
+            embed.description = "Nenhuma avaliação pendente. 🎉"
+        for position, (message_id, entry) in enumerate(entries, start=self.page * QUEUE_PAGE_SIZE + 1):
+            marker = "☑️" if message_id in self.selected else "▫️"
+            embed.add_field(name=f"{marker} #{position} — {'⭐' * entry['stars']} {entry['author_name']}",
+                            value=f"> {entry['comment'][:QUEUE_PREVIEW_CHARS]}", inline=False)
+        embed.set_footer(text=f"Página {self.page + 1}/{self.queue.page_count()} • "
+                              f"{len(self.queue)} pendentes • {len(self.selected)} selecionadas")
+        return embed
+
+    async def resolve_selected(self, interaction: discord.Interaction, approve: bool):
+        await interaction.response.defer(ephemeral=True)
+        try:
+            count = await resolve_vouches(interaction.guild, self.queue, self.selected, approve)
+        except discord.HTTPException as e:
+            # Os lotes já publicados saíram da fila; o restante voltou a ela e continua selecionado
+            self.refresh()
+            await interaction.edit_original_response(embed=self.build_embed(), view=self)
+            await interaction.followup.send(f"❌ Erro ao processar as avaliações: {str(e)}", ephemeral=True)
+            return
+        self.selected.clear()
+        self.refresh()
+        await interaction.edit_original_response(embed=self.build_embed(), view=self)
+        if approve:
+            await interaction.followup.send(f"✅ {count} avaliações aprovadas e publicadas!", ephemeral=True)
+        else:
+            await interaction.followup.send(f"🗑️ {count} avaliações reprovadas e excluídas.", ephemeral=True)
+
+    @ui.button(label="Anterior", style=ButtonStyle.secondary, emoji="◀️")
+    async def previous_page(self, interaction: discord.Interaction, button: ui.Button):
+        self.page -= 1
+        self.refresh()
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+    @ui.button(label="Próxima", style=ButtonStyle.secondary, emoji="▶️")
+    async def next_page(self, interaction: discord.Interaction, button: ui.Button):
+        self.page += 1
+        self.refresh()
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+    @ui.button(label="Aprovar Selecionadas", style=ButtonStyle.success)
+    async def approve_selected(self, interaction: discord.Interaction, button: ui.Button):
+        await self.resolve_selected(interaction, approve=True)
+
+    @ui.button(label="Reprovar Selecionadas", style=ButtonStyle.danger)
+    async def reject_selected(self, interaction: discord.Interaction, button: ui.Button):
+        await self.resolve_selected(interaction, approve=False)
 
 
 class StarButton(ui.Button['StarRatingView']):
@@ -99,6 +379,12 @@ class StarRatingView(ui.View):
 class VouchCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        state = bot.cog_state.pop(self.qualified_name, None)
+        self.queue = VouchQueue(pending=state["pending"]) if state else VouchQueue()
+        self.bot.add_view(ApprovalView())
+
+    def cog_unload(self):
+        self.bot.cog_state[self.qualified_name] = {"pending": self.queue.pending}
 
     @app_commands.command(name="avaliar", description="Deixe uma avaliação sobre um serviço prestado.")
     async def avaliar_vouch(self, interaction: discord.Interaction):
@@ -114,6 +400,12 @@ class VouchCog(commands.Cog):
             ephemeral=True
         )
 
+    @app_commands.command(name="avaliacoes_pendentes", description="Revisa e modera as avaliações pendentes em lote.")
+    @app_commands.default_permissions(administrator=True)
+    async def avaliacoes_pendentes(self, interaction: discord.Interaction):
+        view = VouchQueueView(self.queue)
+        await interaction.response.send_message(embed=view.build_embed(), view=view, ephemeral=True)
+
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(VouchCog(bot))
\ No newline at end of file
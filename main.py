@@ -1,5 +1,11 @@
 import os
+import sys
+import json
+import time
+import hashlib
 import asyncio
+import threading
+import traceback
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
@@ -8,6 +14,11 @@ load_dotenv()
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 GUILD_ID = os.getenv("GUILD_ID")
+HOT_RELOAD = os.getenv("HOT_RELOAD", "").lower() in ("1", "true", "sim")
+HOT_RELOAD_INTERVAL = 2  # segundos entre verificações dos arquivos dos cogs
+LOOP_LAG_INTERVAL = 0.25  # segundos entre batimentos do event loop
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", "0.5"))  # atraso (s) que dispara o dump da pilha
+LOOP_LAG_WATCHDOG_INTERVAL = 0.05  # segundos entre verificações da thread do watchdog
 
 if not BOT_TOKEN:
     raise ValueError("O TOKEN do bot não foi encontrado no arquivo .env")
@@ -22,16 +33,20 @@ class MeuBot(commands.Bot):
 
         super().__init__(command_prefix="!", intents=intents)
         self.guild_id = discord.Object(id=int(GUILD_ID))
+        # Estado em memória entregue de uma instância de cog para a próxima durante um reload
+        self.cog_state = {}
+        self.synced_signature = None
+        self.loop_thread_id = None
+        self.loop_heartbeat = time.monotonic()
+        self.loop_lag = 0.0
+        self.max_loop_lag = 0.0
 
     async def setup_hook(self):
-        from cogs.Cadastro.sistema_cadastro import RegistrationView
-        from cogs.vouches.sistema_avaliacao import ApprovalView
-        from cogs.brefing.forms import BriefingView
-
-        self.add_view(RegistrationView())
-        self.add_view(ApprovalView())
-        self.add_view(BriefingView())
+        self.loop_thread_id = threading.get_ident()
+        self.loop_lag_task = asyncio.create_task(self.measure_loop_lag())
+        threading.Thread(target=self.loop_lag_watchdog, name="loop-lag-watchdog", daemon=True).start()
 
+        # As views persistentes são registradas pelos próprios cogs, para que um reload as substitua
         print("Carregando Cogs...")
         for root, dirs, files in os.walk('./cogs'):
             for filename in files:
@@ -43,9 +58,90 @@ class MeuBot(commands.Bot):
                     except Exception as e:
                         print(f"Erro ao carregar o Cog '{module_path}': {e}")
 
+        await self.sync_commands(force=True)
+        print("Árvore de comandos sincronizada com o servidor.")
+
+        if HOT_RELOAD:
+            self.hot_reload_task = asyncio.create_task(self.watch_cogs())
+            print("Hot reload ativado: observando alterações nos cogs.")
+
+    def command_signature(self):
+        # Ordenado por nome: o reload_extension recoloca os comandos do cog no fim da árvore
+        payload = sorted((command.to_dict(self.tree) for command in self.tree.get_commands(guild=self.guild_id)),
+                         key=lambda command: command["name"])
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    async def sync_commands(self, force=False):
+        """Sincroniza a árvore de comandos só quando as assinaturas dos comandos mudaram."""
+        self.tree.clear_commands(guild=self.guild_id)
         self.tree.copy_global_to(guild=self.guild_id)
+        signature = self.command_signature()
+        if not force and signature == self.synced_signature:
+            return False
         await self.tree.sync(guild=self.guild_id)
-        print("Árvore de comandos sincronizada com o servidor.")
+        self.synced_signature = signature
+        return True
+
+    async def reload_cog(self, extension):
+        """Recarrega uma extensão sem reconectar ao gateway. Retorna (tempo em ms, se houve sync)."""
+        started = time.perf_counter()
+        await self.reload_extension(extension)
+        synced = await self.sync_commands()
+        return (time.perf_counter() - started) * 1000, synced
+
+    async def watch_cogs(self):
+        mtimes = {}
+        while not self.is_closed():
+            for extension, module in list(self.extensions.items()):
+                try:
+                    mtime = os.path.getmtime(module.__file__)
+                except (OSError, TypeError):
+                    continue
+                if extension in mtimes and mtimes[extension] != mtime:
+                    try:
+                        elapsed, synced = await self.reload_cog(extension)
+                        print(f"  -> Cog '{extension}' recarregado em {elapsed:.0f}ms"
+                              f"{' (comandos sincronizados)' if synced else ''}.")
+                    except Exception as e:
+                        print(f"Erro ao recarregar o Cog '{extension}': {e}")
+                mtimes[extension] = mtime
+            await asyncio.sleep(HOT_RELOAD_INTERVAL)
+
+    async def measure_loop_lag(self):
+        """Mede continuamente o atraso do event loop e atualiza o batimento lido pelo watchdog.
+
+        Não imprime nada: o log de travamentos (com a pilha) é feito só pelo loop_lag_watchdog.
+        """
+        while not self.is_closed():
+            expected = time.monotonic() + LOOP_LAG_INTERVAL
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            now = time.monotonic()
+            self.loop_heartbeat = now
+            self.loop_lag = max(0.0, now - expected)
+            self.max_loop_lag = max(self.max_loop_lag, self.loop_lag)
+
+    def loop_lag_watchdog(self):
+        """Roda numa thread auxiliar: se o loop parar de bater, mostra a pilha do código que o bloqueia.
+
+        O batimento normal já tem até LOOP_LAG_INTERVAL de idade, então o atraso do loop é o tempo sem
+        batimento menos esse intervalo; a pilha é capturada assim que ele passa de LOOP_LAG_THRESHOLD.
+        Como a thread verifica a cada LOOP_LAG_WATCHDOG_INTERVAL, um bloqueio que mal passa do limite
+        pode terminar antes da captura; nesse caso ele só aparece em loop_lag/max_loop_lag (exibidos no /perfil).
+        """
+        reported_heartbeat = None
+        while not self.is_closed():
+            time.sleep(LOOP_LAG_WATCHDOG_INTERVAL)
+            heartbeat = self.loop_heartbeat
+            stalled = time.monotonic() - heartbeat
+            if stalled - LOOP_LAG_INTERVAL < LOOP_LAG_THRESHOLD or heartbeat == reported_heartbeat:
+                continue
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is None:
+                continue
+            reported_heartbeat = heartbeat
+            stack = "".join(traceback.format_stack(frame))
+            print(f"[watchdog] Event loop atrasado em {(stalled - LOOP_LAG_INTERVAL) * 1000:.0f}ms. "
+                  f"Pilha atual:\n{stack}")
 
     async def on_ready(self):
         activity = discord.Streaming(name="Feito por alvl_dev", url="https://www.twitch.tv/placeholder")